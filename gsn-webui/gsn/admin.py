@@ -1,5 +1,6 @@
 from django.contrib import admin
-from gsn.models import GSNUser
+from django.utils.html import format_html
+from gsn.models import GSNUser, RequestProfile
 
 
 # Register your models here.
@@ -16,3 +17,20 @@ class GSNUserAdmin(admin.ModelAdmin):
 
 
 admin.site.register(GSNUser, GSNUserAdmin)
+
+
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ['created', 'method', 'path', 'username', 'status_code', 'duration']
+    list_filter = ['method', 'status_code']
+    search_fields = ['path', 'username']
+    readonly_fields = ['created', 'method', 'path', 'username', 'status_code', 'duration', 'phases', 'stacks']
+    exclude = ['profile_file']
+
+    def stacks(self, obj):
+        return format_html('<pre>{}</pre>', obj.stacks())
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(RequestProfile, RequestProfileAdmin)
@@ -0,0 +1,185 @@
+import csv
+import logging
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Columnar export formats: name -> (content type, file extension)
+
+COLUMNAR_FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.file', 'arrow'),
+}
+
+
+class LineBuffer(object):
+    """
+    Pseudo file for the csv writer, returning each written line instead of storing it
+    """
+
+    def write(self, value):
+        return value
+
+
+class StreamSink(object):
+    """
+    Write-only file object buffering what the columnar writers produce until it is drained into the response
+    """
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def arrow_type(field):
+    """
+    Maps the type of a GSN output field to an arrow type. Unknown types are kept as strings.
+    """
+    name = (field['type'] or '').lower()
+
+    if name == 'time':
+        return pa.timestamp('ms', tz='UTC')
+    if name.startswith(('double', 'float', 'real', 'numeric', 'decimal')):
+        return pa.float64()
+    if name.startswith(('bigint', 'long', 'int', 'smallint', 'tinyint')):
+        return pa.int64()
+
+    return pa.string()
+
+
+def arrow_schema(fields):
+    """
+    Builds the schema of the export from the fields metadata of a sensor, keeping the unit and the GSN type
+    """
+    return pa.schema([
+        pa.field(field['name'], arrow_type(field), metadata={
+            'unit': field['unit'] or '',
+            'type': field['type'] or ''
+        }) for field in fields])
+
+
+def coerce(value, column_type):
+    if value is None:
+        return None
+    if pa.types.is_floating(column_type):
+        return float(value)
+    if pa.types.is_integer(column_type) or pa.types.is_timestamp(column_type):
+        return int(value)
+
+    return str(value)
+
+
+def record_batch(schema, rows):
+    """
+    Transposes a slice of row-oriented values into a typed record batch
+    """
+    columns = []
+
+    for idx, column in enumerate(schema):
+        columns.append(pa.array([coerce(row[idx], column.type) for row in rows], type=column.type))
+
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def write_csv(fields, pages, no_data):
+    """
+    Generator yielding a CSV file one line at a time from the pages of values of the service, with the time of
+    each value added as first column. The no_data line is written if there is no value at all.
+
+    The response is already sent when a page fails (IOError): an error line then ends the file, so that the
+    download is not silently truncated.
+    """
+    writer = csv.writer(LineBuffer())
+
+    # Same time field as add_time
+    fields = [{'unit': '', 'name': 'time', 'type': 'time'}] + fields
+
+    yield writer.writerow([field['name'] + " (" + (field['unit'] if field['unit'] is not None else 'no unit') + " " + (
+        field['type'] if field['type'] is not None else 'no type') + ")" for field in fields])
+
+    empty = True
+
+    try:
+        for values in pages:
+            for value in values:
+                empty = False
+                yield writer.writerow([datetime.fromtimestamp(value[0] / 1000).isoformat('T')] + value)
+    except IOError as e:
+        logger.error('CSV export interrupted: %s', e)
+        yield writer.writerow(['Error: the download is incomplete, ' + str(e)])
+        return
+
+    if empty:
+        yield writer.writerow([no_data])
+
+
+def write_columnar(fields, pages, export_format, row_group_size):
+    """
+    Generator yielding a compressed Parquet or Arrow IPC file from the pages of values of the service. Pages are
+    gathered in row groups of row_group_size values, so that only a single row group is held and encoded in
+    memory while the response is streamed to the client.
+
+    If a page fails (IOError), the file is left without its footer so that readers reject it rather than see a
+    truncated export.
+    """
+    schema = arrow_schema(fields)
+    sink = StreamSink()
+    stream = pa.PythonFile(sink, mode='w')
+
+    if export_format == 'parquet':
+        writer = pq.ParquetWriter(stream, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(stream, schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+
+    def write(rows):
+        batch = record_batch(schema, rows)
+
+        if export_format == 'parquet':
+            writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            writer.write_batch(batch)
+
+    rows = []
+
+    try:
+        for values in pages:
+            rows.extend(values)
+
+            while len(rows) >= row_group_size:
+                write(rows[:row_group_size])
+                rows = rows[row_group_size:]
+                yield sink.drain()
+    except IOError as e:
+        logger.error('%s export interrupted: %s', export_format, e)
+        return
+
+    if rows:
+        write(rows)
+
+    writer.close()
+
+    yield sink.drain()
@@ -0,0 +1,83 @@
+import numpy as np
+
+
+def is_number(value):
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def parse_esri(text):
+    """
+    Parses the Esri ASCII output of the grid service into a list of (timestamp, header, grid) tuples, one per
+    time step. Grids are float32 arrays, the cells holding the nodata_value are set to NaN.
+    """
+    grids = []
+    header, rows = {}, []
+
+    def flush():
+        grid = np.array(rows, dtype=np.float32)
+        if header.get('nodata_value') is not None:
+            grid[grid == np.float32(header['nodata_value'])] = np.nan
+        grids.append((int(header['timestamp']), header, grid))
+
+    for line in text.splitlines():
+        parts = line.split()
+
+        if not parts:
+            continue
+
+        if is_number(parts[0]):
+            rows.append(parts)
+            continue
+
+        if parts[0].lower() == 'timestamp' and rows:
+            flush()
+            header, rows = {}, []
+
+        header[parts[0].lower()] = parts[1] if len(parts) > 1 else None
+
+    if rows:
+        flush()
+
+    return grids
+
+
+def tile(grid, zoom, x, y, tile_size):
+    """
+    Cuts the grid in 2^zoom x 2^zoom tiles and returns the tile (x, y), x counted from the west and y from the
+    north. Tiles larger than tile_size cells are reduced by averaging blocks of cells, ignoring NaN.
+    Returns None if the tile is out of the grid, or holds no cell at that zoom.
+    """
+    if zoom > max(grid.shape).bit_length():
+        return None
+
+    count = 2 ** zoom
+
+    if x >= count or y >= count:
+        return None
+
+    rows, cols = grid.shape
+    part = grid[y * rows // count:(y + 1) * rows // count, x * cols // count:(x + 1) * cols // count]
+
+    if part.size == 0:
+        return None
+
+    factor = -(-max(part.shape + (1,)) // tile_size)
+
+    if factor <= 1:
+        return part
+
+    # Pad with NaN to a multiple of the factor, then average each factor x factor block
+    padded = np.full((-(-part.shape[0] // factor) * factor, -(-part.shape[1] // factor) * factor), np.nan,
+                     dtype=np.float32)
+    padded[:part.shape[0], :part.shape[1]] = part
+    blocks = padded.reshape(padded.shape[0] // factor, factor, padded.shape[1] // factor, factor)
+
+    counts = np.sum(~np.isnan(blocks), axis=(1, 3))
+    sums = np.nansum(blocks, axis=(1, 3))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan).astype(np.float32)
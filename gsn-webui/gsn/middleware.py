@@ -0,0 +1,217 @@
+import collections
+import logging
+import os
+import random
+import sys
+import time
+import uuid
+from django.conf import settings
+from django.db import connection
+from gsn.models import RequestProfile, profiling_dir
+
+try:
+    import greenlet
+    from gevent import monkey
+except ImportError:
+    monkey = None
+
+# Native threads, locks and sleep, even once gevent has patched them for the requests
+
+if monkey is not None:
+    allocate_lock, get_ident, start_new_thread = [monkey.get_original('_thread', name) for name in (
+        'allocate_lock', 'get_ident', 'start_new_thread')]
+    sleep = monkey.get_original('time', 'sleep')
+else:
+    from _thread import allocate_lock, get_ident, start_new_thread
+    from time import sleep
+
+logger = logging.getLogger(__name__)
+
+# Profiling settings
+
+profiling_sample_rate = settings.GSN.get('PROFILING_SAMPLE_RATE', 0.0)
+profiling_slow_threshold = settings.GSN.get('PROFILING_SLOW_THRESHOLD', 2.0)
+profiling_interval = settings.GSN.get('PROFILING_INTERVAL', 0.005)
+profiling_max_profiles = settings.GSN.get('PROFILING_MAX_PROFILES', 100)
+
+# Phases a sample is attributed to, from the innermost frame outwards
+
+PHASE_FILES = [
+    ('decode', ('/json/decoder.py', '/json/scanner.py')),
+    ('serialization', ('/json/encoder.py', '/django/http/response.py', '/gsn/export.py', '/pyarrow/')),
+    ('db', ('/django/db/',)),
+    ('upstream', ('/requests/', '/urllib3/', '/http/client.py', '/socket.py', '/ssl.py')),
+]
+
+
+def gevent_patched():
+    return monkey is not None and monkey.is_module_patched('threading')
+
+
+def phase_of(code):
+    if code.co_name == 'add_time':
+        return 'add_time'
+
+    filename = code.co_filename.replace('\\', '/')
+
+    for phase, paths in PHASE_FILES:
+        if any(path in filename for path in paths):
+            return phase
+
+    return None
+
+
+class StackSampler(object):
+    """
+    Collapsed stacks and phases of the samples of the calling request.
+
+    All the profiled requests of a worker are sampled at PROFILING_INTERVAL by a single thread, started with the
+    first of them and ending with the last. It is a native thread even under the gevent workers, where requests
+    are greenlets sharing a thread: the frame of the request greenlet is then read while it is switched out, or
+    the frame of its thread while it runs.
+    """
+
+    active = set()
+    lock = allocate_lock()
+    running = False
+
+    def __init__(self):
+        self.stacks = collections.Counter()
+        self.phases = collections.Counter()
+        self.started = time.time()
+
+        thread_id = get_ident()
+
+        if gevent_patched():
+            request = greenlet.getcurrent()
+            # A greenlet only keeps its frame while it is switched out
+            self.current_frame = lambda: request.gr_frame or sys._current_frames().get(thread_id)
+        else:
+            self.current_frame = lambda: sys._current_frames().get(thread_id)
+
+    def start(self):
+        with StackSampler.lock:
+            StackSampler.active.add(self)
+
+            if not StackSampler.running:
+                StackSampler.running = True
+                start_new_thread(StackSampler.run, ())
+
+    @classmethod
+    def run(cls):
+        while True:
+            sleep(profiling_interval)
+
+            with cls.lock:
+                if not cls.active:
+                    cls.running = False
+                    return
+
+                for sampler in cls.active:
+                    sampler.sample()
+
+    def sample(self):
+        frame = self.current_frame()
+        stack = []
+        phase = None
+
+        while frame is not None:
+            if phase is None:
+                phase = phase_of(frame.f_code)
+            stack.append('%s (%s:%d)' % (frame.f_code.co_name, os.path.basename(frame.f_code.co_filename),
+                                         frame.f_code.co_firstlineno))
+            frame = frame.f_back
+
+        if stack:
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.phases[phase or 'other'] += 1
+
+    def stop(self):
+        with StackSampler.lock:
+            StackSampler.active.discard(self)
+
+        return time.time() - self.started
+
+
+class ProfilingMiddleware(object):
+    """
+    Profiles a PROFILING_SAMPLE_RATE fraction of the requests, or any request of a staff user sending the
+    X-GSN-Profile header. Profiled requests slower than PROFILING_SLOW_THRESHOLD seconds, or explicitly requested,
+    are kept in a ring of PROFILING_MAX_PROFILES profiles browsable from the admin.
+
+    Only the view is profiled, the body of streaming responses is produced after the middleware returns.
+    """
+
+    def process_request(self, request):
+        requested = 'HTTP_X_GSN_PROFILE' in request.META and request.user.is_staff
+
+        if not requested and random.random() >= profiling_sample_rate:
+            return None
+
+        request.profiler_requested = requested
+        request.profiler_queries = len(connection.queries_log)
+        connection.force_debug_cursor = True
+
+        request.profiler = StackSampler()
+        request.profiler.start()
+
+    def process_response(self, request, response):
+        sampler = getattr(request, 'profiler', None)
+
+        if sampler is None:
+            return response
+
+        duration = sampler.stop()
+        queries = list(connection.queries_log)[request.profiler_queries:]
+        connection.force_debug_cursor = False
+
+        if duration < profiling_slow_threshold and not request.profiler_requested:
+            return response
+
+        samples = sum(sampler.phases.values()) or 1
+        phases = dict((phase, duration * count / samples) for phase, count in sampler.phases.items())
+
+        if queries:
+            phases['db'] = sum(float(query['time']) for query in queries)
+
+        # Profiling must never fail the request it profiles
+        try:
+            profile = store_profile(request, response, duration, phases, sampler.stacks)
+        except Exception:
+            logger.exception('Could not store the profile of %s', request.path)
+            return response
+
+        if request.profiler_requested:
+            response['X-GSN-Profile-Id'] = str(profile.pk)
+
+        return response
+
+
+def store_profile(request, response, duration, phases, stacks):
+    """
+    Writes the collapsed stacks of the request to the profiling directory and records it, dropping the oldest
+    profiles beyond PROFILING_MAX_PROFILES
+    """
+
+    os.makedirs(profiling_dir, exist_ok=True)
+
+    profile = RequestProfile(
+        method=request.method,
+        path=request.path[:255],
+        username=request.user.username if request.user.is_authenticated() else '',
+        status_code=response.status_code,
+        duration=duration,
+        phases=phases,
+        profile_file=uuid.uuid4().hex + '.txt'
+    )
+
+    with open(profile.profile_path(), 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(stack + ' ' + str(count) + '\n')
+
+    profile.save()
+
+    for old_profile in RequestProfile.objects.order_by('-created', '-pk')[profiling_max_profiles:]:
+        old_profile.delete()
+
+    return profile
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import jsonfield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gsn', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=255)),
+                ('username', models.CharField(blank=True, max_length=30)),
+                ('status_code', models.IntegerField()),
+                ('duration', models.FloatField()),
+                ('phases', jsonfield.fields.JSONField(default=dict)),
+                ('profile_file', models.CharField(max_length=255)),
+            ],
+        ),
+    ]
@@ -1,7 +1,14 @@
+import os
+from django.conf import settings
 from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import AbstractUser
 from jsonfield import JSONField
 
+# Directory of the profiles captured by gsn.middleware.ProfilingMiddleware
+profiling_dir = settings.GSN.get('PROFILING_DIR', '/tmp/gsn-webui-profiles')
+
 
 class GSNUser(AbstractUser):
     access_token = models.CharField(max_length=100, null=True, blank=True)
@@ -9,3 +16,35 @@ class GSNUser(AbstractUser):
     token_created_date = models.DateTimeField(null=True, blank=True)
     token_expire_date = models.DateTimeField(null=True, blank=True)
     favorites = JSONField()
+
+
+class RequestProfile(models.Model):
+    created = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    username = models.CharField(max_length=30, blank=True)
+    status_code = models.IntegerField()
+    duration = models.FloatField()
+    phases = JSONField()
+    profile_file = models.CharField(max_length=255)
+
+    def profile_path(self):
+        return os.path.join(profiling_dir, self.profile_file)
+
+    def stacks(self):
+        """
+        Returns the collapsed stacks of the profile, the most sampled first
+        """
+        try:
+            with open(self.profile_path()) as f:
+                return f.read()
+        except IOError:
+            return ''
+
+
+@receiver(post_delete, sender=RequestProfile)
+def remove_profile_file(sender, instance, **kwargs):
+    try:
+        os.remove(instance.profile_path())
+    except OSError:
+        pass
@@ -0,0 +1,217 @@
+import warnings
+import numpy as np
+
+# Quantiles kept for each field and time bucket, the percentiles of a range are estimated from them
+
+SKETCH_SIZE = 101
+SKETCH_QUANTILES = np.linspace(0, 100, SKETCH_SIZE)
+
+# Size merged sketches are reduced to, once they reach ten times that size
+
+MERGED_SKETCH_SIZE = 1001
+
+NUMERIC_TYPES = ('double', 'float', 'real', 'numeric', 'decimal', 'bigint', 'long', 'int', 'smallint', 'tinyint')
+
+
+def numeric_columns(fields):
+    """
+    Returns the (index, field) of the numeric fields of the service output
+    """
+    return [(idx, field) for idx, field in enumerate(fields)
+            if field['name'] != 'timestamp' and (field['type'] or '').lower().startswith(NUMERIC_TYPES)]
+
+
+def summarize(timestamps, values, names, gap):
+    """
+    Computes the partial aggregates of a time bucket: timestamps is the sorted array of the times (in ms) of the
+    values, values a 2D float array with a column per field (NaN for missing values) and gap the interval (in ms)
+    above which two consecutive values are separated by a gap.
+    """
+    intervals = np.diff(timestamps)
+    gaps = intervals[intervals > gap]
+
+    times = {
+        'count': len(timestamps),
+        'first': int(timestamps[0]) if len(timestamps) else None,
+        'last': int(timestamps[-1]) if len(timestamps) else None,
+        'gaps': len(gaps),
+        'longest_gap': int(gaps.max()) if len(gaps) else 0,
+        'gap_time': int(gaps.sum())
+    }
+
+    if not len(timestamps):
+        return {
+            'times': times,
+            'fields': {}
+        }
+
+    counts = np.sum(~np.isnan(values), axis=0)
+
+    with warnings.catch_warnings():
+        # Columns without any value give NaN, they are dropped below
+        warnings.simplefilter('ignore', RuntimeWarning)
+        means = np.nanmean(values, axis=0)
+        m2s = np.nansum((values - means) ** 2, axis=0)
+        mins = np.nanmin(values, axis=0)
+        maxs = np.nanmax(values, axis=0)
+        sketches = np.nanpercentile(values, SKETCH_QUANTILES, axis=0)
+
+    fields = {}
+
+    for idx, name in enumerate(names):
+        if counts[idx] == 0:
+            continue
+
+        fields[name] = {
+            'count': int(counts[idx]),
+            'mean': float(means[idx]),
+            'm2': float(m2s[idx]),
+            'min': float(mins[idx]),
+            'max': float(maxs[idx]),
+            'points': sketches[:, idx],
+            'weights': sketch_weights(counts[idx], SKETCH_SIZE)
+        }
+
+    return {
+        'times': times,
+        'fields': fields
+    }
+
+
+def merge(first, second, gap):
+    """
+    Merges the partial aggregates of two consecutive time ranges, first preceding second
+    """
+    if first is None:
+        return second
+
+    a, b = first['times'], second['times']
+
+    times = {
+        'count': a['count'] + b['count'],
+        'first': a['first'] if a['first'] is not None else b['first'],
+        'last': b['last'] if b['last'] is not None else a['last'],
+        'gaps': a['gaps'] + b['gaps'],
+        'longest_gap': max(a['longest_gap'], b['longest_gap']),
+        'gap_time': a['gap_time'] + b['gap_time']
+    }
+
+    # The interval between the two ranges
+    if a['last'] is not None and b['first'] is not None and b['first'] - a['last'] > gap:
+        times['gaps'] += 1
+        times['longest_gap'] = max(times['longest_gap'], b['first'] - a['last'])
+        times['gap_time'] += b['first'] - a['last']
+
+    fields = dict(first['fields'])
+
+    for name, y in second['fields'].items():
+        x = fields.get(name)
+
+        if x is None:
+            fields[name] = y
+            continue
+
+        count = x['count'] + y['count']
+        delta = y['mean'] - x['mean']
+
+        fields[name] = compress({
+            'count': count,
+            'mean': x['mean'] + delta * y['count'] / count,
+            'm2': x['m2'] + y['m2'] + delta ** 2 * x['count'] * y['count'] / count,
+            'min': min(x['min'], y['min']),
+            'max': max(x['max'], y['max']),
+            'points': np.concatenate([x['points'], y['points']]),
+            'weights': np.concatenate([x['weights'], y['weights']])
+        })
+
+    return {
+        'times': times,
+        'fields': fields
+    }
+
+
+def sketch_weights(count, size):
+    """
+    Share of the values each point of an evenly spaced quantile sketch stands for, half a step for the extremes
+    """
+    weights = np.full(size, count / float(size - 1))
+    weights[[0, -1]] /= 2
+
+    return weights
+
+
+def weighted_percentiles(points, weights, percentiles):
+    """
+    Interpolates the percentiles of weighted quantile points
+    """
+    order = np.argsort(points)
+    points, weights = points[order], weights[order]
+    cdf = (np.cumsum(weights) - weights / 2) / weights.sum()
+
+    return np.interp(np.asarray(percentiles) / 100.0, cdf, points)
+
+
+def compress(aggregate):
+    """
+    Reduces the quantile points of a merged aggregate to MERGED_SKETCH_SIZE once they grow too large
+    """
+    if len(aggregate['points']) > 10 * MERGED_SKETCH_SIZE:
+        aggregate['points'] = weighted_percentiles(aggregate['points'], aggregate['weights'],
+                                                   np.linspace(0, 100, MERGED_SKETCH_SIZE))
+        aggregate['weights'] = sketch_weights(aggregate['count'], MERGED_SKETCH_SIZE)
+
+    return aggregate
+
+
+def summary(aggregate, fields, percentiles, start, end, gap):
+    """
+    Final statistics of a range from its merged aggregates. The time before the first and after the last value
+    counts as a gap if it is longer than the gap interval. Percentiles are estimated from the quantile sketches.
+    """
+    times = dict(aggregate['times'])
+
+    edges = [end - start] if times['first'] is None else [times['first'] - start, end - times['last']]
+
+    for edge in edges:
+        if edge > gap:
+            times['gaps'] += 1
+            times['longest_gap'] = max(times['longest_gap'], edge)
+            times['gap_time'] += edge
+
+    result = {
+        'count': times['count'],
+        'first': times['first'],
+        'last': times['last'],
+        'gaps': {
+            'threshold': gap,
+            'count': times['gaps'],
+            'longest': times['longest_gap'],
+            'total': times['gap_time'],
+            'coverage': 1 - float(times['gap_time']) / (end - start) if end > start else 0
+        },
+        'fields': {}
+    }
+
+    for field in fields:
+        stats = {
+            'unit': field['unit'],
+            'type': field['type'],
+            'count': 0
+        }
+
+        x = aggregate['fields'].get(field['name'])
+
+        if x is not None:
+            stats.update({
+                'count': x['count'],
+                'min': x['min'],
+                'max': x['max'],
+                'mean': x['mean'],
+                'std': (x['m2'] / x['count']) ** 0.5,
+                'percentiles': dict(('%g' % p, float(v)) for p, v in zip(
+                    percentiles, weighted_percentiles(x['points'], x['weights'], percentiles)))
+            })
+
+        result['fields'][field['name']] = stats
+
+    return result
@@ -1,3 +1,212 @@
-from django.test import TestCase
+import io
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.test import SimpleTestCase
+from gsn.export import write_columnar, write_csv
+from gsn.grids import parse_esri, tile
+from gsn.stats import merge, summarize, summary
 
-# Create your tests here.
+FIELDS = [
+    {'name': 'timestamp', 'unit': 'ms', 'type': 'time'},
+    {'name': 'temperature', 'unit': 'C', 'type': 'double'},
+    {'name': 'station', 'unit': None, 'type': 'varchar(32)'},
+]
+
+
+class ExportTests(SimpleTestCase):
+
+    pages = [
+        [[1450000002000, 2.5, 'a'], [1450000001000, None, 'b']],
+        [[1450000000000, -1.0, None]],
+    ]
+
+    def test_parquet_round_trip(self):
+        content = b''.join(write_columnar(FIELDS, iter(self.pages), 'parquet', 2))
+        parquet = pq.ParquetFile(io.BytesIO(content))
+        table = parquet.read()
+
+        self.assertEqual(parquet.metadata.num_row_groups, 2)
+        self.assertEqual(table.column('temperature').to_pylist(), [2.5, None, -1.0])
+        self.assertEqual(table.column('station').to_pylist(), ['a', 'b', None])
+        self.assertEqual(table.schema.field('timestamp').type, pa.timestamp('ms', tz='UTC'))
+        self.assertEqual(table.schema.field('temperature').metadata[b'unit'], b'C')
+
+    def test_arrow_round_trip(self):
+        content = b''.join(write_columnar(FIELDS, iter(self.pages), 'arrow', 10))
+        reader = pa.ipc.open_file(pa.BufferReader(content))
+
+        self.assertEqual(reader.num_record_batches, 1)
+        self.assertEqual(reader.read_all().column('temperature').to_pylist(), [2.5, None, -1.0])
+
+    def test_columnar_without_values(self):
+        content = b''.join(write_columnar(FIELDS, iter([[]]), 'parquet', 10))
+        table = pq.read_table(io.BytesIO(content))
+
+        self.assertEqual(table.num_rows, 0)
+        self.assertEqual(table.schema.names, ['timestamp', 'temperature', 'station'])
+
+    def test_csv(self):
+        lines = list(write_csv(FIELDS, iter(self.pages), 'No data'))
+
+        self.assertEqual(lines[0], 'time ( time),timestamp (ms time),temperature (C double),'
+                                   'station (no unit varchar(32))\r\n')
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].endswith(',1450000002000,2.5,a\r\n'))
+
+    def test_csv_failed_page(self):
+        def pages():
+            yield self.pages[0]
+            raise IOError('The data of the sensor could not be read')
+
+        lines = list(write_csv(FIELDS, pages(), 'No data'))
+
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[-1], '"Error: the download is incomplete,'
+                                    ' The data of the sensor could not be read"\r\n')
+
+    def test_columnar_failed_page(self):
+        def pages():
+            yield self.pages[0]
+            raise IOError('The data of the sensor could not be read')
+
+        content = b''.join(write_columnar(FIELDS, pages(), 'parquet', 1))
+
+        with self.assertRaises(pa.ArrowInvalid):
+            pq.read_table(io.BytesIO(content))
+
+    def test_csv_without_values(self):
+        self.assertEqual(list(write_csv(FIELDS, iter([[]]), 'No data'))[1:], ['No data\r\n'])
+
+
+ESRI = """timestamp 1450000000000
+ncols 3
+nrows 2
+xllcorner 0.0
+yllcorner 0.0
+cellsize 1.0
+NODATA_value -9999
+1 2 -9999
+4 5 6
+
+timestamp 1450000060000
+ncols 3
+nrows 2
+xllcorner 0.0
+yllcorner 0.0
+cellsize 1.0
+NODATA_value -9999
+7 8 9
+-9999 11 12
+"""
+
+
+class GridTests(SimpleTestCase):
+
+    def test_parse_esri(self):
+        grids = parse_esri(ESRI)
+
+        self.assertEqual([timestamp for timestamp, header, grid in grids], [1450000000000, 1450000060000])
+        self.assertEqual(grids[0][1]['ncols'], '3')
+        self.assertEqual(grids[0][2].dtype, np.float32)
+        np.testing.assert_array_equal(grids[0][2], [[1, 2, np.nan], [4, 5, 6]])
+        np.testing.assert_array_equal(grids[1][2], [[7, 8, 9], [np.nan, 11, 12]])
+
+    def test_parse_empty(self):
+        self.assertEqual(parse_esri(''), [])
+
+    def test_tile_whole_grid(self):
+        grid = np.arange(6, dtype=np.float32).reshape(2, 3)
+
+        np.testing.assert_array_equal(tile(grid, 0, 0, 0, 256), grid)
+
+    def test_tile_parts(self):
+        grid = np.arange(16, dtype=np.float32).reshape(4, 4)
+
+        np.testing.assert_array_equal(tile(grid, 1, 1, 0, 256), [[2, 3], [6, 7]])
+        np.testing.assert_array_equal(tile(grid, 1, 0, 1, 256), [[8, 9], [12, 13]])
+
+    def test_tile_averages_ignoring_nan(self):
+        grid = np.array([[1, 3, np.nan, np.nan], [5, 7, np.nan, 2]], dtype=np.float32)
+
+        np.testing.assert_array_equal(tile(grid, 0, 0, 0, 2), [[4, 2]])
+
+    def test_tile_out_of_grid(self):
+        grid = np.zeros((4, 4), dtype=np.float32)
+
+        self.assertIsNone(tile(grid, 1, 2, 0, 256))
+        self.assertIsNone(tile(grid, 10, 0, 0, 256))
+
+    def test_tile_without_cells(self):
+        self.assertIsNone(tile(np.zeros((3, 3), dtype=np.float32), 2, 0, 0, 256))
+        self.assertIsNone(tile(np.zeros((1000, 10), dtype=np.float32), 10, 0, 0, 256))
+
+
+def bucketed(timestamps, values, size, gap):
+    aggregate = None
+
+    for start in range(0, len(timestamps), size):
+        aggregate = merge(aggregate, summarize(timestamps[start:start + size], values[start:start + size], ['v'],
+                                               gap), gap)
+
+    return aggregate
+
+
+class StatsTests(SimpleTestCase):
+
+    field = {'name': 'v', 'unit': 'C', 'type': 'double'}
+
+    def setUp(self):
+        self.timestamps = np.arange(0, 5000 * 1000, 1000, dtype=np.int64)
+        self.values = np.random.RandomState(0).normal(10, 3, (5000, 1))
+
+    def test_merge_matches_single_pass(self):
+        single = summarize(self.timestamps, self.values, ['v'], 10000)
+        merged = bucketed(self.timestamps, self.values, 700, 10000)
+        stats = summary(merged, [self.field], [5, 50, 95], 0, 5000 * 1000, 10000)['fields']['v']
+
+        self.assertEqual(merged['fields']['v']['count'], 5000)
+        self.assertAlmostEqual(merged['fields']['v']['mean'], single['fields']['v']['mean'])
+        self.assertAlmostEqual(merged['fields']['v']['m2'], single['fields']['v']['m2'], places=6)
+        self.assertAlmostEqual(stats['std'], self.values.std())
+        self.assertEqual(stats['min'], self.values.min())
+        self.assertEqual(stats['max'], self.values.max())
+
+        for p in (5, 50, 95):
+            self.assertAlmostEqual(stats['percentiles']['%g' % p], np.percentile(self.values, p), delta=0.1)
+
+    def test_missing_values(self):
+        values = self.values.copy()
+        values[::2] = np.nan
+        stats = summary(bucketed(self.timestamps, values, 700, 10000), [self.field], [50], 0, 5000 * 1000,
+                        10000)['fields']['v']
+
+        self.assertEqual(stats['count'], 2500)
+        self.assertAlmostEqual(stats['mean'], np.nanmean(values))
+
+    def test_gaps(self):
+        timestamps = np.concatenate([self.timestamps[:1000], self.timestamps[3000:]])
+        values = np.concatenate([self.values[:1000], self.values[3000:]])
+        result = summary(bucketed(timestamps, values, 700, 10000), [self.field], [50], 0, 5000 * 1000, 10000)
+
+        self.assertEqual(result['count'], 3000)
+        self.assertEqual(result['gaps']['count'], 1)
+        self.assertEqual(result['gaps']['longest'], 2001 * 1000)
+        self.assertAlmostEqual(result['gaps']['coverage'], 1 - 2001 / 5000.0)
+
+    def test_empty_buckets(self):
+        empty = summarize(np.array([], dtype=np.int64), np.empty((0, 1)), ['v'], 10000)
+        full = summarize(self.timestamps[:100], self.values[:100], ['v'], 10000)
+
+        self.assertEqual(empty['fields'], {})
+        self.assertEqual(merge(merge(empty, full, 10000), empty, 10000)['fields']['v']['count'], 100)
+        self.assertEqual(merge(empty, full, 10000)['times']['first'], 0)
+
+    def test_summary_without_values(self):
+        empty = summarize(np.array([], dtype=np.int64), np.empty((0, 1)), ['v'], 10000)
+        result = summary(merge(None, empty, 10000), [self.field], [50], 0, 100000, 10000)
+
+        self.assertEqual(result['count'], 0)
+        self.assertEqual(result['gaps']['count'], 1)
+        self.assertEqual(result['gaps']['coverage'], 0)
+        self.assertEqual(result['fields']['v'], {'unit': 'C', 'type': 'double', 'count': 0})
@@ -8,6 +8,15 @@ urlpatterns = [
     url(r'^sensors/$', views.sensors, name='sensors'),
     url(r'^sensors/(?P<sensor_name>(\w)+)/(?P<from_date>(\w|:|-)+)/(?P<to_date>(\w|:|-)+)/$', views.sensor_detail,
         name='sensor_detail'),
+    url(r'^sensors/(?P<sensor_name>(\w)+)/summary/(?P<from_date>(\w|:|-)+)/(?P<to_date>(\w|:|-)+)/$',
+        views.sensor_summary, name='sensor_summary'),
+    url(r'^sensors/(?P<sensor_name>(\w)+)/updates/$', views.sensor_updates, name='sensor_updates'),
+    url(r'^sensors/(?P<sensor_name>(\w)+)/events/$', views.sensor_events, name='sensor_events'),
+    url(r'^grid/(?P<sensor_name>(\w)+)/$', views.grid_data, name='grid_data'),
+    url(r'^grid/(?P<sensor_name>(\w)+)/(?P<timestamp>\d+)/tiles/(?P<zoom>\d+)/(?P<x>\d+)/(?P<y>\d+)/$',
+        views.grid_tile, name='grid_tile'),
+    url(r'^grid/(?P<sensor_name>(\w)+)/point/$', views.grid_point, name='grid_point'),
+    url(r'^grid/(?P<sensor_name>(\w)+)/timeseries/$', views.grid_timeseries, name='grid_timeseries'),
     url(r'^download/(?P<sensor_name>(\w)+)/(?P<from_date>(\w|:|-)+)/(?P<to_date>(\w|:|-)+)/$', views.download_csv,
         name='download_csv'),
     url(r'^download/$', csrf_exempt(views.download), name='download'),
@@ -17,6 +26,7 @@ urlpatterns = [
     url(r'^oauth_code/$', views.oauth_get_code, name='oauth_logging_redirect'),
     url(r'^favorites/$', views.favorites_manage, name='favorites'),
     url(r'^favorites_list/$', views.favorites_list, name='favorites_list'),
+    url(r'^favorites/events/$', views.favorites_events, name='favorites_events'),
     url(r'^dashboard/(?P<sensor_name>(\w)+)/$', views.dashboard, name='dashboard'),
 
     # url(r'^logged/$', views.oauth_after_log, name='oauth_after_log'),
@@ -1,18 +1,28 @@
+import calendar
 import csv
+import hashlib
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from urllib.parse import urlencode
 import requests
 import re
+import numpy as np
 from django.conf import settings
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.http import HttpResponse, JsonResponse, HttpResponseRedirect, HttpResponseNotFound
-from django.http import HttpResponseForbidden
+from django.http import HttpResponseForbidden, HttpResponseBadRequest, StreamingHttpResponse, QueryDict
 from django.shortcuts import redirect
 from django.template import loader
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
+from gsn.export import COLUMNAR_FORMATS, write_columnar, write_csv
+from gsn.grids import parse_esri, tile
 from gsn.models import GSNUser
+from gsn.stats import merge, numeric_columns, summarize, summary
 
 # Server adress and services
 
@@ -27,6 +37,17 @@ oauth_token_url = settings.GSN['SERVICE_URL_LOCAL'] + "oauth2/token"
 oauth_user_url = settings.GSN['SERVICE_URL_LOCAL'] + "api/user"
 api_websocket = re.sub(r"http(s)?://", "ws://", settings.GSN['SERVICE_URL_PUBLIC'])
 max_query_size = settings.GSN['MAX_QUERY_SIZE']
+export_row_group_size = settings.GSN.get('EXPORT_ROW_GROUP_SIZE', 10000)
+live_updates_interval = settings.GSN.get('LIVE_UPDATES_INTERVAL', 5)
+live_updates_duration = settings.GSN.get('LIVE_UPDATES_DURATION', 25)
+live_updates_concurrency = settings.GSN.get('LIVE_UPDATES_CONCURRENCY', 8)
+grid_tile_size = settings.GSN.get('GRID_TILE_SIZE', 256)
+grid_cache_timeout = settings.GSN.get('GRID_CACHE_TIMEOUT', 3600)
+grid_max_steps = settings.GSN.get('GRID_MAX_STEPS', 100)
+summary_bucket = settings.GSN.get('SUMMARY_BUCKET', 86400)
+summary_gap = settings.GSN.get('SUMMARY_GAP', 600)
+summary_cache_timeout = settings.GSN.get('SUMMARY_CACHE_TIMEOUT', 604800)
+summary_max_buckets = settings.GSN.get('SUMMARY_MAX_BUCKETS', 30)
 
 
 # Views
@@ -142,6 +163,9 @@ def sensor_detail(request, sensor_name, from_date, to_date):
     Returns the details of a sensor and its values for a specified time frame in iso8601. Adds a time value to the
     data.
 
+    The fields (comma separated field names) and filter (a condition such as temperature>10) parameters are passed
+    to the service. With a fields projection, all the fields of the sensor are listed in available_fields.
+
     If the user is logged out, returns the details stripped from the value field.
     """
 
@@ -157,7 +181,9 @@ def sensor_detail(request, sensor_name, from_date, to_date):
 
         payload = {
             'from': from_date,
-            'to': to_date
+            'to': to_date,
+            'fields': request.GET.get('fields'),
+            'filter': request.GET.get('filter')
         }
 
         r = requests.get(oauth_sensors_url + '/' + sensor_name + '/data', headers=headers, params=payload)
@@ -178,6 +204,18 @@ def sensor_detail(request, sensor_name, from_date, to_date):
 
         data = add_time(data)
 
+        if user_data['has_access'] and 'fields' in request.GET:
+            r = requests.get(oauth_sensors_url + '/' + sensor_name, headers=headers, params={'latestValues': False})
+
+            if r.status_code != 200:
+                return JsonResponse({
+                    'error': 'The fields of the sensor could not be read'
+                })
+
+            data['properties'].update({
+                'available_fields': json.loads(r.text)['properties']['fields']
+            })
+
         data.update({
             'user': user_data
         })
@@ -216,39 +254,426 @@ def sensor_detail(request, sensor_name, from_date, to_date):
 
 
 @login_required
-def download_csv(request, sensor_name, from_date, to_date):
+def sensor_updates(request, sensor_name):
+    """
+    Returns the values of a sensor newer than the since parameter (timestamp in ms), so that clients can refresh
+    the data they hold without reloading the whole time frame. The since value of the response is the cursor to
+    use for the next call, more is true if values were left for that call. Takes the fields parameter of
+    sensor_detail.
+    """
+
+    try:
+        since = int(request.GET['since'])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest('since must be a timestamp in milliseconds')
+
+    updates = fetch_updates(create_headers(request.user), sensor_name, since, request.GET.get('fields'))
+
+    if updates is None:
+        return JsonResponse({
+            'error': 'The specified sensor doesn\'t exist'
+        })
+
+    data, since, more = updates
+
+    data.update({
+        'since': since,
+        'more': more
+    })
+
+    return JsonResponse(data)
+
+
+@login_required
+def sensor_events(request, sensor_name):
+    """
+    Server-Sent Events stream pushing the new values of a sensor, takes the fields parameter of sensor_detail
+    """
+    return event_stream(request, [sensor_name], request.GET.get('fields'))
+
+
+@login_required
+def favorites_events(request):
+    """
+    Server-Sent Events stream pushing the new values of all the favorite sensors of the user
+    """
+    if len(request.user.favorites) < 1:
+        return HttpResponseNotFound()
+
+    return event_stream(request, list(request.user.favorites))
+
+
+def event_stream(request, sensor_names, fields=None):
+    """
+    Streams the new values of the sensors, starting after the since parameter (timestamp in ms, now by default).
+    Values waiting beyond a page are sent without waiting for the next poll. The stream is closed after
+    LIVE_UPDATES_DURATION seconds, the browser then reconnects and resumes from the Last-Event-ID it received.
+
+    Each open stream holds a request for that long: the web UI must run on an asynchronous worker class, such as
+    the gevent workers of gunicorn used by start-prod.sh, so that streams do not block the other requests.
+    """
+
+    try:
+        since = int(request.GET.get('since', time.time() * 1000))
+    except ValueError:
+        return HttpResponseBadRequest('since must be a timestamp in milliseconds')
+
+    cursors = dict((sensor_name, since) for sensor_name in sensor_names)
+
+    for sensor_name, value in QueryDict(request.META.get('HTTP_LAST_EVENT_ID', '')).items():
+        if sensor_name in cursors and value.isdigit():
+            cursors[sensor_name] = int(value)
+
+    response = StreamingHttpResponse(stream_updates(request.user, cursors, fields), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+
+    return response
+
+
+def stream_updates(user, cursors, fields=None):
+    deadline = time.time() + live_updates_duration
+    pool = ThreadPoolExecutor(min(len(cursors), live_updates_concurrency))
+
+    yield 'retry: 1000\n\n'
+
+    try:
+        while True:
+            headers = create_headers(user)
+            names = list(cursors)
+            more = False
+
+            # The sensors are polled concurrently, so that favorites do not wait for each other
+            for sensor_name, updates in zip(names, pool.map(
+                    lambda sensor_name: fetch_updates(headers, sensor_name, cursors[sensor_name], fields), names)):
+
+                if updates is None:
+                    continue
+
+                data, cursors[sensor_name], sensor_more = updates
+                more = more or sensor_more
+
+                if not data['properties']['values']:
+                    continue
+
+                yield 'id: ' + urlencode(cursors) + '\ndata: ' + json.dumps({
+                    'sensor': sensor_name,
+                    'fields': data['properties']['fields'],
+                    'values': data['properties']['values']
+                }) + '\n\n'
+
+            if more and time.time() < deadline:
+                continue
+
+            if time.time() + live_updates_interval > deadline:
+                break
+
+            # Comment line, keeps proxies from closing an idle connection
+            yield ': keep-alive\n\n'
+
+            time.sleep(live_updates_interval)
+    finally:
+        pool.shutdown(wait=False)
+
+
+@login_required
+def grid_data(request, sensor_name):
     """
-    Create a CSV out of the sensor data then sends it to the client to be downloaded
+    Returns the grids of a raster sensor as a binary array of little-endian float32, of shape given by the
+    X-Grid-Shape header (time steps, rows, columns). NaN marks the cells without data. Takes the from, to, size
+    (1 by default, the latest grid) and box parameters of the grid service.
     """
 
     payload = {
-        'from': from_date,
-        'to': to_date,
-        'size': max_query_size
+        'from': request.GET.get('from'),
+        'to': request.GET.get('to'),
+        'size': request.GET.get('size', 1),
+        'box': request.GET.get('box')
+    }
+
+    grids = fetch_grids(request.user, sensor_name, payload)
+
+    if not grids:
+        return HttpResponseNotFound()
+
+    response = grid_response([grid for timestamp, header, grid in grids])
+    response['X-Grid-Timestamps'] = ','.join(str(timestamp) for timestamp, header, grid in grids)
+    response['X-Grid-Header'] = json.dumps(dict((key, value) for key, value in grids[0][1].items()
+                                                if key != 'timestamp'))
+
+    return response
+
+
+@login_required
+def grid_tile(request, sensor_name, timestamp, zoom, x, y):
+    """
+    Returns the tile (x, y) of the grid of the given timestamp (in ms) cut in 2^zoom x 2^zoom tiles, in the binary
+    format of grid_data. Tiles are cached, as well as the grids they are cut from.
+    """
+
+    key = cache_key('grid-tile', sensor_name.lower(), timestamp, zoom, x, y)
+    cached = cache.get(key)
+
+    if cached is None:
+        grid = get_grid(request.user, sensor_name, int(timestamp))
+
+        if grid is None:
+            return HttpResponseNotFound()
+
+        cached = tile(grid, int(zoom), int(x), int(y), grid_tile_size)
+
+        if cached is None:
+            return HttpResponseNotFound()
+
+        cache.set(key, cached, grid_cache_timeout)
+
+    return grid_response([cached])
+
+
+@login_required
+def grid_point(request, sensor_name):
+    """
+    Returns the timeseries of the cell (row, col) of the grids between from and to, both required. The grids of
+    the range are fetched once and cached, so that other cells are read from the cache. Only the latest
+    GRID_MAX_STEPS grids of the range are read, truncated is true if there may be older ones.
+    """
+
+    try:
+        row = int(request.GET['row'])
+        col = int(request.GET['col'])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest('row and col must be integers')
+
+    from_date = request.GET.get('from')
+    to_date = request.GET.get('to')
+
+    if not from_date or not to_date:
+        return HttpResponseBadRequest('from and to are required')
+
+    range_key = cache_key('grid-range', sensor_name.lower(), from_date, to_date)
+    timestamps = cache.get(range_key)
+    grids = cache.get_many([grid_key(sensor_name, timestamp) for timestamp in timestamps or []])
+
+    if timestamps is None or len(grids) < len(timestamps):
+        fetched = fetch_grids(request.user, sensor_name, {
+            'from': from_date,
+            'to': to_date,
+            'size': grid_max_steps
+        })
+
+        if fetched is None:
+            return HttpResponseNotFound()
+
+        timestamps = [timestamp for timestamp, header, grid in fetched]
+        grids = dict((grid_key(sensor_name, timestamp), grid) for timestamp, header, grid in fetched)
+
+        cache.set(range_key, timestamps, grid_cache_timeout)
+
+    values = []
+
+    for timestamp in sorted(timestamps):
+        grid = grids[grid_key(sensor_name, timestamp)]
+
+        if not (0 <= row < grid.shape[0] and 0 <= col < grid.shape[1]):
+            return HttpResponseBadRequest('The cell is out of the grid')
+
+        value = float(grid[row, col])
+        values.append([timestamp, None if np.isnan(value) else value])
+
+    return JsonResponse({
+        'row': row,
+        'col': col,
+        'values': values,
+        'truncated': len(timestamps) >= grid_max_steps
+    })
+
+
+@login_required
+def grid_timeseries(request, sensor_name):
+    """
+    Returns the timeseries of a raster sensor aggregated (agg: min, max, sum or avg) over the grid or the box
+    """
+
+    payload = {
+        'from': request.GET.get('from'),
+        'to': request.GET.get('to'),
+        'box': request.GET.get('box'),
+        'agg': request.GET.get('agg', 'avg')
     }
 
+    r = requests.get(oauth_sensors_url + '/' + sensor_name + '/grid/timeseries', headers=create_headers(request.user),
+                     params=payload)
+
+    if r.status_code != 200:
+        return JsonResponse({
+            'error': r.text
+        })
+
+    return JsonResponse(add_time(json.loads(r.text)))
+
+
+def grid_response(grids):
+    data = np.stack(grids).astype('<f4')
+
+    response = HttpResponse(data.tobytes(), content_type='application/octet-stream')
+    response['X-Grid-Shape'] = ','.join(str(size) for size in data.shape)
+
+    return response
+
+
+@login_required
+def sensor_summary(request, sensor_name, from_date, to_date):
+    """
+    Returns the count, min, max, mean, standard deviation and percentiles of each numeric field of a sensor over a
+    time frame, along with the gaps in its data. The time frame is read in buckets of SUMMARY_BUCKET seconds, the
+    aggregates of the complete past buckets are cached and combined for longer time frames.
+
+    At most SUMMARY_MAX_BUCKETS buckets are read from the service per call: beyond that, the call reads and caches
+    that many and answers 202 with the number of buckets still pending, the client calls again to continue.
+    Buckets after now are not read.
+
+    Takes the fields parameter of sensor_detail, percentiles (comma separated, 5,25,50,75,95 by default) and gap
+    (seconds between two values counted as a gap, SUMMARY_GAP by default).
+    """
+
+    try:
+        start = parse_date(from_date)
+        end = parse_date(to_date)
+        percentiles = [float(p) for p in request.GET.get('percentiles', '5,25,50,75,95').split(',')]
+        gap = int(float(request.GET.get('gap', summary_gap)) * 1000)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid dates, percentiles or gap')
+
+    if end <= start or not all(0 <= p <= 100 for p in percentiles):
+        return HttpResponseBadRequest('Invalid dates, percentiles or gap')
+
     headers = create_headers(request.user)
+    fields = request.GET.get('fields')
 
-    data = json.loads(requests.get(oauth_sensors_url + '/' + sensor_name + '/data', headers=headers, params=payload))
+    # Also checks the access to the sensor, as the cached aggregates are shared between users
+    r = requests.get(oauth_sensors_url + '/' + sensor_name + '/data', headers=headers, params={
+        'from': from_date,
+        'to': to_date,
+        'size': 1,
+        'fields': fields
+    })
 
-    data = add_time(data)
+    if r.status_code != 200:
+        return JsonResponse({
+            'error': 'The specified sensor doesn\'t exist'
+        })
 
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="' + sensor_name + '.csv"'
+    columns = numeric_columns(json.loads(r.text)['properties']['fields'])
+
+    bucket = summary_bucket * 1000
+    now = int(time.time() * 1000)
+    # No values are read after now, that time only counts as a gap
+    buckets = range(start // bucket * bucket, min(end, now), bucket)
+    keys = dict((b, cache_key('summary', sensor_name.lower(), fields or '', bucket, gap, b)) for b in buckets)
+    # Only complete buckets in the past are cached, the others may still change
+    complete = set(b for b in buckets if start <= b and b + bucket <= min(end, now))
+    cached = cache.get_many([keys[b] for b in complete])
+    missing = [b for b in buckets if keys[b] not in cached]
+    uncached = [b for b in missing if b in complete]
+
+    if len(missing) > summary_max_buckets and uncached:
+        # Too long to read at once: the next complete buckets are read and cached, the client calls again
+        for b in uncached[:summary_max_buckets]:
+            partial = summarize_range(headers, sensor_name, fields, columns, b, b + bucket, gap)
+
+            if partial is None:
+                return JsonResponse({
+                    'error': 'The data of the sensor could not be read'
+                })
 
-    writer = csv.writer(response)
+            cache.set(keys[b], partial, summary_cache_timeout)
 
-    if 'error' in data:
-        return HttpResponseForbidden()
+        return JsonResponse({
+            'sensor': sensor_name,
+            'from': from_date,
+            'to': to_date,
+            'pending': max(len(uncached) - summary_max_buckets, 0)
+        }, status=202)
 
-    writer.writerow([field['name'] + " (" + (field['unit'] if field['unit'] is not None else 'no unit') + " " + (
-        field['type'] if field['type'] is not None else 'no type') + ")" for field in data['properties']['fields']])
+    aggregate = summarize(np.empty(0, dtype=np.int64), np.empty((0, len(columns))),
+                          [field['name'] for idx, field in columns], gap)
+
+    for b in buckets:
+        partial = cached.get(keys[b])
+
+        if partial is None:
+            partial = summarize_range(headers, sensor_name, fields, columns, max(b, start), min(b + bucket, end), gap)
+
+            if partial is None:
+                return JsonResponse({
+                    'error': 'The data of the sensor could not be read'
+                })
+
+            if b in complete:
+                cache.set(keys[b], partial, summary_cache_timeout)
+
+        aggregate = merge(aggregate, partial, gap)
+
+    data = summary(aggregate, [field for idx, field in columns], percentiles, start, end, gap)
+
+    data.update({
+        'sensor': sensor_name,
+        'from': from_date,
+        'to': to_date
+    })
+
+    return JsonResponse(data)
+
+
+@login_required
+def download_csv(request, sensor_name, from_date, to_date):
+    """
+    Create a CSV out of the sensor data then streams it to the client to be downloaded. The optional format
+    parameter (parquet or arrow) sends a compressed columnar file instead. The fields and filter parameters are
+    passed to the service as in sensor_detail.
+
+    The data is read from the service one page of MAX_QUERY_SIZE values at a time, newest first, so the size of
+    the download is not limited.
+    """
+
+    export_format = request.GET.get('format', 'csv')
 
-    if 'values' in data['properties']:
-        for value in data['properties']['values']:
-            writer.writerow(value)
+    if export_format != 'csv' and export_format not in COLUMNAR_FORMATS:
+        return HttpResponseBadRequest('Unknown format: ' + export_format)
+
+    try:
+        start = parse_date(from_date) // 1000
+        end = parse_date(to_date) // 1000
+    except ValueError:
+        return HttpResponseBadRequest('Invalid dates')
+
+    headers = create_headers(request.user)
+    fields = request.GET.get('fields')
+    value_filter = request.GET.get('filter')
+
+    r = data_page(headers, sensor_name, start, end, fields, value_filter)
+
+    if r.status_code == 403:
+        return HttpResponseForbidden(r.text)
+
+    if r.status_code != 200:
+        return JsonResponse({
+            'error': r.text
+        }, status=r.status_code)
+
+    data = json.loads(r.text)
+    pages = data_pages(headers, sensor_name, start, end, data, fields, value_filter)
+
+    if export_format in COLUMNAR_FORMATS:
+        content_type, extension = COLUMNAR_FORMATS[export_format]
+        content = write_columnar(data['properties']['fields'], pages, export_format, export_row_group_size)
     else:
-        writer.writerow(["No data for the selected timespan: " + from_date + ", " + to_date])
+        content_type, extension = 'text/csv', 'csv'
+        content = write_csv(data['properties']['fields'], pages,
+                            "No data for the selected timespan: " + from_date + ", " + to_date)
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = 'attachment; filename="' + sensor_name + '.' + extension + '"'
 
     return response
 
@@ -392,3 +817,196 @@ def add_time(data):
     })
 
     return data
+
+
+def data_page(headers, sensor_name, start, end, fields=None, value_filter=None):
+    """
+    Requests the newest MAX_QUERY_SIZE values of a sensor between start and end (in seconds, both excluded as by
+    the service), newest first
+    """
+
+    payload = {
+        'from': datetime.utcfromtimestamp(start).isoformat('T'),
+        'to': datetime.utcfromtimestamp(end).isoformat('T'),
+        'size': max_query_size,
+        'fields': fields,
+        'filter': value_filter
+    }
+
+    return requests.get(oauth_sensors_url + '/' + sensor_name + '/data', headers=headers, params=payload)
+
+
+def data_pages(headers, sensor_name, start, end, data, fields=None, value_filter=None):
+    """
+    Generator over the values of a sensor between start and end (in seconds, excluded), one page at a time and
+    newest first, data being the first page as returned by data_page. Older pages are requested until one is not
+    full, so that no request reaches the size limits of the service.
+
+    The service only takes dates to the second: the values in the second of the oldest value of a full page are
+    left to the next page, which ends right after that second. Raises IOError if a page cannot be read.
+    """
+
+    while True:
+        values = data['properties'].get('values', [])
+
+        if len(values) < max_query_size:
+            yield values
+            return
+
+        second = min(value[0] for value in values) // 1000
+
+        if second + 1 >= end:
+            raise IOError('More than %d values in a second, the data cannot be paged' % max_query_size)
+
+        yield [value for value in values if value[0] // 1000 > second]
+
+        end = second + 1
+        r = data_page(headers, sensor_name, start, end, fields, value_filter)
+
+        if r.status_code != 200:
+            raise IOError('The data of the sensor could not be read: ' + r.text)
+
+        data = json.loads(r.text)
+
+
+def fetch_updates(headers, sensor_name, since, fields=None):
+    """
+    Gets the values of a sensor with a timestamp strictly greater than since (in ms), oldest first and with the
+    time added. Returns the data, the cursor for the next call and whether more values are waiting, or None if the
+    sensor is not accessible.
+
+    The service only returns the newest values of a full page: if more than MAX_QUERY_SIZE values are newer than
+    since, the time frame is halved until its values fit in a page, and the cursor is set to the end of that time
+    frame rather than past values that were not sent. Only values beyond MAX_QUERY_SIZE within a single second
+    cannot be paged this way.
+    """
+
+    # The service only takes dates to the second, the remaining values are filtered here
+    start = since // 1000
+    end = None
+
+    while True:
+        payload = {
+            'from': datetime.utcfromtimestamp(start).isoformat('T'),
+            'to': datetime.utcfromtimestamp(end).isoformat('T') if end is not None else None,
+            'size': max_query_size,
+            'fields': fields
+        }
+
+        r = requests.get(oauth_sensors_url + '/' + sensor_name + '/data', headers=headers, params=payload)
+
+        if r.status_code != 200:
+            return None
+
+        data = json.loads(r.text)
+        upper = end if end is not None else int(time.time()) + 1
+
+        if len(data['properties']['values']) < max_query_size or upper - start <= 1:
+            break
+
+        end = (start + upper) // 2
+
+    data['properties']['values'] = sorted([values for values in data['properties']['values'] if values[0] > since],
+                                          key=lambda values: values[0])
+
+    if end is not None:
+        cursor = end * 1000 - 1
+    elif data['properties']['values']:
+        cursor = data['properties']['values'][-1][0]
+    else:
+        cursor = since
+
+    return add_time(data), cursor, end is not None
+
+
+def cache_key(prefix, *parts):
+    """
+    Cache key of the parts of a request, hashed as they may hold characters or lengths memcached does not accept
+    """
+    return prefix + ':' + hashlib.md5(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def grid_key(sensor_name, timestamp, box=None):
+    return cache_key('grid', sensor_name.lower(), timestamp, box or '')
+
+
+def fetch_grids(user, sensor_name, payload):
+    """
+    Gets the grids of a raster sensor from the service as (timestamp, header, grid) tuples and caches each of them.
+    Returns None if the sensor is not accessible.
+    """
+
+    r = requests.get(oauth_sensors_url + '/' + sensor_name + '/grid', headers=create_headers(user), params=payload)
+
+    if r.status_code != 200:
+        return None
+
+    grids = parse_esri(r.text)
+
+    cache.set_many(dict((grid_key(sensor_name, timestamp, payload.get('box')), grid)
+                        for timestamp, header, grid in grids), grid_cache_timeout)
+
+    return grids
+
+
+def get_grid(user, sensor_name, timestamp):
+    """
+    Returns the grid of the given timestamp (in ms), from the cache if possible
+    """
+
+    grid = cache.get(grid_key(sensor_name, timestamp))
+
+    if grid is None:
+        # The service only takes dates to the second and excludes the bounds
+        grids = fetch_grids(user, sensor_name, {
+            'from': datetime.utcfromtimestamp((timestamp - 1) // 1000).isoformat('T'),
+            'to': datetime.utcfromtimestamp(timestamp // 1000 + 1).isoformat('T')
+        })
+
+        for grid_timestamp, header, cached in grids or []:
+            if grid_timestamp == timestamp:
+                grid = cached
+
+    return grid
+
+
+def summarize_range(headers, sensor_name, fields, columns, start, end, gap):
+    """
+    Computes the partial aggregates of the values of a sensor between start (included) and end (excluded), in ms.
+    The values are read in pages, as the service truncates larger answers. Returns None if the data cannot be read.
+    """
+
+    # The service only takes dates to the second and excludes the bounds, the values are filtered here
+    r = data_page(headers, sensor_name, (start - 1) // 1000, end // 1000 + 1, fields)
+
+    if r.status_code != 200:
+        return None
+
+    try:
+        rows = [row for values in data_pages(headers, sensor_name, (start - 1) // 1000, end // 1000 + 1,
+                                             json.loads(r.text), fields) for row in values]
+    except IOError:
+        return None
+
+    timestamps = np.array([row[0] for row in rows], dtype=np.int64)
+    values = np.array([[row[idx] for idx, field in columns] for row in rows], dtype=float).reshape(
+        len(rows), len(columns))
+
+    selected = (timestamps >= start) & (timestamps < end)
+    order = np.argsort(timestamps[selected], kind='mergesort')
+
+    return summarize(timestamps[selected][order], values[selected][order], [field['name'] for idx, field in columns],
+                     gap)
+
+
+def parse_date(value):
+    """
+    Parses the dates of the urls, in UTC, to a timestamp in ms
+    """
+    for date_format in ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%d'):
+        try:
+            return calendar.timegm(datetime.strptime(value, date_format).timetuple()) * 1000
+        except ValueError:
+            pass
+
+    raise ValueError('Invalid date: ' + value)
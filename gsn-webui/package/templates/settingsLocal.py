@@ -14,12 +14,39 @@ DATABASES = {
 #    },
 }
 
+# The grids and the summaries are cached, in a memcached server shared by the gunicorn workers. Grids larger than
+# the item size limit of memcached (1 MB by default, -I option) are not cached.
+# See https://docs.djangoproject.com/en/1.8/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': '127.0.0.1:11211',
+    }
+}
+
 GSN = {
     'CLIENT_ID': 'web-gui-public',
     'CLIENT_SECRET': 'web-gui-secret',
     'SERVICE_URL_PUBLIC': 'http://localhost:9000/ws/', # used for in-browser redirects
     'SERVICE_URL_LOCAL': 'http://localhost:9000/ws/',  # used for on-server direct calls
     'WEBUI_URL': 'http://127.0.0.1:8000/',             # used for in-browser redirects
-    'MAX_QUERY_SIZE': 5000,
+    'MAX_QUERY_SIZE': 5000,                            # values per request to the service, keep under its gsn.data.limit
+    'EXPORT_ROW_GROUP_SIZE': 10000,                    # rows per row group in parquet/arrow downloads
+    'LIVE_UPDATES_INTERVAL': 5,                        # seconds between two polls of the live updates streams
+    'LIVE_UPDATES_DURATION': 25,                       # seconds before a stream is closed and the browser reconnects
+    'LIVE_UPDATES_CONCURRENCY': 8,                     # sensors of a stream polled at the same time
+    'PROFILING_SAMPLE_RATE': 0.0,                      # fraction of the requests profiled, staff can send X-GSN-Profile
+    'PROFILING_SLOW_THRESHOLD': 2.0,                   # seconds above which a profiled request is kept
+    'PROFILING_INTERVAL': 0.005,                       # seconds between two samples of a profiled request
+    'PROFILING_DIR': '/tmp/gsn-webui-profiles',        # where the kept profiles are written
+    'PROFILING_MAX_PROFILES': 100,                     # number of profiles kept, the oldest are dropped
+    'GRID_TILE_SIZE': 256,                             # maximum number of cells on a side of a grid tile
+    'GRID_CACHE_TIMEOUT': 3600,                        # seconds the grids and tiles are kept in the cache
+    'GRID_MAX_STEPS': 100,                             # grids read at most for the timeseries of a cell
+    'SUMMARY_BUCKET': 86400,                           # seconds of data summarized and cached together
+    'SUMMARY_GAP': 600,                                # seconds between two values counted as a gap
+    'SUMMARY_CACHE_TIMEOUT': 604800,                   # seconds the summaries of past buckets are cached
+    'SUMMARY_MAX_BUCKETS': 30,                         # buckets read from the service per summary call
 }
 
@@ -4,5 +4,5 @@ source env3/bin/activate
 pip install -r requirements.txt
 python manage.py bower install
 python manage.py migrate
-gunicorn app.wsgi
+gunicorn -k gevent app.wsgi
 deactivate
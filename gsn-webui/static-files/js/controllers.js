@@ -152,15 +152,20 @@ gsnControllers.service('downloadService', ['$window', '$http', function ($window
 
     };
 
-    this.downloadMultiple = function (sensorList, from, to) {
+    this.downloadMultiple = function (sensorList, from, to, format) {
+
+        format = format || 'csv';
 
         sensorList.forEach(function (sensor) {
 
-            $http.get('download/' + sensor + '/' + from + '/' + to + '/').success(function (data, status, headers, config) {
-                var myBlob = new Blob([data], {type: 'text/html'});
+            $http.get('download/' + sensor + '/' + from + '/' + to + '/', {
+                params: {'format': format},
+                responseType: 'arraybuffer'
+            }).success(function (data, status, headers, config) {
+                var myBlob = new Blob([data], {type: headers('Content-Type')});
                 var blobURL = ($window.URL || $window.webkitURL).createObjectURL(myBlob);
                 var anchor = document.createElement("a");
-                anchor.download = sensor + ".csv";
+                anchor.download = sensor + "." + format;
                 anchor.href = blobURL;
                 anchor.click();
             }).error(function (data, status, headers, config) {
@@ -228,6 +233,9 @@ gsnControllers.controller('DownloadCtrl', ['$scope', '$window', '$http', 'sensor
 
     $scope.download = downloadService.downloadMultiple;
 
+    $scope.formats = ['csv', 'parquet', 'arrow'];
+    $scope.format = 'csv';
+
     $scope.minMultipleSelectSize = 20;
 
 
@@ -407,8 +415,8 @@ gsnControllers.controller('SensorListCtrl', ['$scope', 'sensorService', 'favorit
 
 }]);
 
-gsnControllers.controller('SensorDetailsCtrl', ['$scope', '$http', '$routeParams', '$window', 'downloadService', 'localStorageService', 'favoritesService',
-    function ($scope, $http, $routeParams, $window, downloadService, localStorageService, favoritesService) {
+gsnControllers.controller('SensorDetailsCtrl', ['$scope', '$http', '$routeParams', '$window', '$timeout', 'downloadService', 'localStorageService', 'favoritesService',
+    function ($scope, $http, $routeParams, $window, $timeout, downloadService, localStorageService, favoritesService) {
 
 
         $scope.loading = true;
@@ -459,19 +467,197 @@ gsnControllers.controller('SensorDetailsCtrl', ['$scope', '$http', '$routeParams
         //}
 
 
+        function detailUrl() {
+            return 'sensors/' + $routeParams.sensorName + '/' + new Date($scope.date.from.date).toJSON().slice(0, 19) + '/' + new Date($scope.date.to.date).toJSON().slice(0, 19) + '/';
+        }
+
+        // Only the timestamps are loaded first, the series of each field are loaded when first shown
         $scope.load = function () {
 
+            loadingFields = {};
 
-            $http.get('sensors/' + $routeParams.sensorName + '/' + new Date($scope.date.from.date).toJSON().slice(0, 19) + '/' + new Date($scope.date.to.date).toJSON().slice(0, 19) + '/').success(function (data) {
+            $http.get(detailUrl(), {params: {'fields': 'timestamp'}}).success(function (data) {
                 $scope.details = data.properties ? data : undefined;
 
                 $scope.loading = false;
 
                 buildData($scope.details);
 
+                if ($scope.details && $scope.details.properties.available_fields) {
+                    var first = $scope.details.properties.available_fields.filter(function (field) {
+                        return field.name != 'timestamp';
+                    })[0];
+
+                    // The live updates are started once the field is loaded, with its projection
+                    if (first) {
+                        loadField(first.name);
+                        return;
+                    }
+                }
+
+                if ($scope.details && $scope.live.enabled) {
+                    $scope.toggleLive();
+                }
+
             });
         };
 
+        var loadingFields = {};
+
+        function loadField(name) {
+            if (loadingFields[name]) {
+                return;
+            }
+            loadingFields[name] = true;
+
+            var details = $scope.details;
+
+            $http.get(detailUrl(), {params: {'fields': name}}).success(function (data) {
+                // Dropped if the time frame was reloaded meanwhile
+                if (data.properties && details === $scope.details) {
+                    mergeField(details, data.properties);
+                    buildData(details);
+
+                    // Reopens the live updates, so that they include the new field
+                    if ($scope.live.enabled) {
+                        $scope.toggleLive();
+                    }
+                }
+            });
+        }
+
+        // Adds the loaded field as a new column of the values, matching the rows on the timestamp
+        function mergeField(details, properties) {
+            var rows = {};
+            var column = details.properties.fields.length;
+
+            details.properties.fields.push(properties.fields[2]);
+            $scope.columns[column] = true;
+
+            details.properties.values.forEach(function (values) {
+                values.push(null);
+                rows[values[1]] = values;
+            });
+
+            properties.values.forEach(function (values) {
+                if (rows[values[1]]) {
+                    rows[values[1]][column] = values[2];
+                }
+            });
+        }
+
+        // Projection of the fields loaded so far, for the incremental updates
+        function loadedFields() {
+            var names = $scope.details.properties.fields.slice(2).map(function (field) {
+                return field.name;
+            });
+
+            return names.length ? names.join(',') : 'timestamp';
+        }
+
+        $scope.summaryPercentiles = ['5', '25', '50', '75', '95'];
+
+        // Long time frames are read over several calls, the server answers with the buckets still pending. Stops if
+        // they do not decrease, when the cache cannot keep them.
+        $scope.loadSummary = function (previous) {
+            $scope.summaryError = undefined;
+
+            $http.get('sensors/' + $routeParams.sensorName + '/summary/' + new Date($scope.date.from.date).toJSON().slice(0, 19) + '/' + new Date($scope.date.to.date).toJSON().slice(0, 19) + '/', {
+                params: {'percentiles': $scope.summaryPercentiles.join(',')}
+            }).success(function (data) {
+                $scope.summaryPending = data.pending;
+
+                if (data.pending !== undefined) {
+                    if (previous !== undefined && data.pending >= previous) {
+                        $scope.summaryPending = undefined;
+                        $scope.summaryError = 'The time frame is too long to be summarized, please select a shorter one';
+                    } else {
+                        $timeout(function () {
+                            $scope.loadSummary(data.pending);
+                        }, 1000);
+                    }
+                    return;
+                }
+
+                $scope.summary = data.fields ? data : undefined;
+            });
+        };
+
+        $scope.live = {enabled: false};
+
+        var events;
+
+        // Latest timestamp (in ms) of the values held by the client
+        function lastTimestamp() {
+            var last = new Date($scope.date.to.date).getTime();
+
+            ($scope.details.properties.values || []).forEach(function (values) {
+                last = Math.max(last, values[1]);
+            });
+
+            return last;
+        }
+
+        // Appends the new values, ordering their columns as the fields loaded so far
+        function appendValues(fields, values) {
+            var names = fields.map(function (field) {
+                return field.name;
+            });
+            var positions = $scope.details.properties.fields.map(function (field) {
+                return names.indexOf(field.name);
+            });
+
+            if (!$scope.details.properties.values) {
+                $scope.details.properties.values = [];
+            }
+
+            values.forEach(function (value) {
+                $scope.details.properties.values.push(positions.map(function (position) {
+                    return position < 0 ? null : value[position];
+                }));
+            });
+
+            buildData($scope.details);
+        }
+
+        // Follows the cursor of the response while the server has more values waiting
+        $scope.update = function (since) {
+            $http.get('sensors/' + $routeParams.sensorName + '/updates/', {
+                params: {'since': since || lastTimestamp(), 'fields': loadedFields()}
+            }).success(function (data) {
+                if (data.properties) {
+                    appendValues(data.properties.fields, data.properties.values);
+
+                    if (data.more) {
+                        $scope.update(data.since);
+                    }
+                }
+            });
+        };
+
+        $scope.toggleLive = function () {
+            if (events) {
+                events.close();
+                events = undefined;
+            }
+
+            if ($scope.live.enabled) {
+                events = new EventSource('sensors/' + $routeParams.sensorName + '/events/?since=' + lastTimestamp() + '&fields=' + loadedFields());
+                events.onmessage = function (message) {
+                    var data = JSON.parse(message.data);
+                    $scope.$apply(function () {
+                        appendValues(data.fields, data.values);
+                    });
+                };
+            }
+        };
+
+        $scope.$on('$destroy', function () {
+            if (events) {
+                events.close();
+            }
+        });
+
         $scope.columns = [true, false, true];
 
         $scope.submit = function () {
@@ -491,6 +677,7 @@ gsnControllers.controller('SensorDetailsCtrl', ['$scope', '$http', '$routeParams
                     $scope.chartConfig.series.push({
                         name: details.properties.fields[k].name + " (" + (!(details.properties.fields[k].unit === null) ? details.properties.fields[k].unit : "no unit") + ") ",
                         id: k,
+                        fieldName: details.properties.fields[k].name,
                         data: []
                     });
 
@@ -517,6 +704,21 @@ gsnControllers.controller('SensorDetailsCtrl', ['$scope', '$http', '$routeParams
                     return serie.data.length > 0
                 });
 
+                // Hidden series for the fields not loaded yet, loaded by the show event
+                (details.properties.available_fields || []).forEach(function (field) {
+                    if (field.name == 'timestamp' || details.properties.fields.some(function (loaded) {
+                            return loaded.name == field.name;
+                        })) {
+                        return;
+                    }
+
+                    $scope.chartConfig.series.push({
+                        name: field.name + " (" + (!(field.unit === null) ? field.unit : "no unit") + ") ",
+                        fieldName: field.name,
+                        visible: false,
+                        data: []
+                    });
+                });
 
             }
         }
@@ -540,6 +742,14 @@ gsnControllers.controller('SensorDetailsCtrl', ['$scope', '$http', '$routeParams
                     series: {
                         marker: {
                             enabled: false
+                        },
+                        events: {
+                            show: function () {
+                                var name = this.options.fieldName;
+                                $scope.$evalAsync(function () {
+                                    loadField(name);
+                                });
+                            }
                         }
                     }
                 }
@@ -569,8 +779,13 @@ gsnControllers.controller('SensorDetailsCtrl', ['$scope', '$http', '$routeParams
         //    $window.open('download/' + $routeParams.sensorName + '/' + $scope.date.from.date + '/' + $scope.date.to.date + '/')
         //};
 
+        $scope.formats = ['csv', 'parquet', 'arrow'];
+        $scope.exportFormat = {format: 'csv'};
+
+        // Downloads all the fields from the server, the details only hold the fields loaded so far
         $scope.download = function () {
-            downloadService.download($scope);
+            downloadService.downloadMultiple([$routeParams.sensorName], new Date($scope.date.from.date).toJSON().slice(0, 19),
+                new Date($scope.date.to.date).toJSON().slice(0, 19), $scope.exportFormat.format);
         };
 
 